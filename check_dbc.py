@@ -1,20 +1,30 @@
-import cantools
+from signal_catalog import SignalCatalog
 
 # 讀取你的 DBC
 dbc_file = "Model3CAN.dbc"
-db = cantools.database.load_file(dbc_file)
+
+# 載入所有 DBC 的訊號索引 (有快取時直接讀取，DBC 變動才重建)
+catalog = SignalCatalog.load()
 
 # 定義充電相關關鍵字
 charge_keywords = ["SOC", "Charge", "Battery", "Charging"]
 
+# 用子字串比對訊號名稱，結果和逐一比對 keyword in name 相同
+matched = {}
+for keyword in charge_keywords:
+    for entry in catalog.search(keyword, fuzzy=False, dbc=dbc_file, limit=None,
+                                signals_only=True, substring=True):
+        matched.setdefault(entry['entry_id'], set()).add(keyword)
+
 found = False
 
-for msg in db.messages:
-    for sig in msg.signals:
-        for keyword in charge_keywords:
-            if keyword.lower() in sig.name.lower():
-                print(f"Message: {msg.name} ({hex(msg.frame_id)}), Signal: {sig.name}")
-                found = True
+# 依照 DBC 中訊息 / 訊號的順序輸出
+for entry_id in sorted(matched):
+    entry = catalog.entries[entry_id]
+    for keyword in charge_keywords:
+        if keyword in matched[entry_id]:
+            print(f"Message: {entry['message_name']} ({hex(entry['frame_id'])}), Signal: {entry['signal_name']}")
+            found = True
 
 if not found:
     print("DBC 中沒有找到明顯的充電相關訊號")
@@ -0,0 +1,457 @@
+import bisect
+import functools
+import glob
+import heapq
+import os
+import pickle
+import re
+import sys
+
+# 索引快取檔案 (與 DBC 放在同一個目錄)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(BASE_DIR, ".signal_catalog.pkl")
+
+# 快取格式版本，索引結構改變時要遞增
+CATALOG_VERSION = 4
+
+# 各欄位的權重：名稱命中排在註解命中之前
+FIELD_WEIGHTS = {
+    "signal": 4,
+    "message": 2,
+    "unit": 1,
+    "value": 1,
+    "comment": 1,
+}
+
+# 比這個長度短的查詢詞只做完整比對，不展開前綴 (單一字母的前綴會命中大部分訊號)
+MIN_PREFIX_LEN = 2
+
+# 命中超過這個數量的前綴，在建立索引時就先合併並排序好
+BROAD_PREFIX_MIN_ENTRIES = 200
+
+# 每個 SignalCatalog 最多快取幾個查詢詞的比對結果
+MATCH_CACHE_SIZE = 256
+
+# 查詢詞和訊號名稱完全相同時的分數，排在所有部分命中之前
+EXACT_NAME_SCORE = 100
+
+# 拆分 CamelCase / 底線 / 數字，例如 hvChargeStatus -> hv, Charge, Status
+# 大寫縮寫後面直接接小寫時這個規則會切成 SOCave292 -> SO, Cave, 292
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# 所以另外把「大寫縮寫 + 小寫」切成兩段，SOCave292 -> SOC, ave
+_ACRONYM_RE = re.compile(r"([A-Z]{2,})([a-z]+)")
+
+
+def split_chunks(text):
+    """依照非英數字元 (底線、空白等) 切開，和 tokenize 的第一步相同"""
+    return [chunk for chunk in re.split(r"[^0-9A-Za-z]+", text) if chunk]
+
+
+def tokenize(text):
+    """
+    把文字拆成小寫的索引詞
+    除了拆開的片段外，也保留完整的名稱，讓完整名稱的前綴也能查到
+    """
+    if not text:
+        return set()
+    text = str(text)
+    terms = set()
+    for chunk in split_chunks(text):
+        terms.add(chunk.lower())
+        for word in _WORD_RE.findall(chunk):
+            terms.add(word.lower())
+        for acronym, word in _ACRONYM_RE.findall(chunk):
+            terms.add(acronym.lower())
+            terms.add(word.lower())
+    return terms
+
+
+def _trigrams_of(term):
+    padded = f"  {term} "
+    return {padded[j:j + 3] for j in range(len(padded) - 2)}
+
+
+def dbc_signature(dbc_files):
+    """用檔名、修改時間和大小判斷 DBC 是否有變動"""
+    signature = []
+    for path in dbc_files:
+        st = os.stat(path)
+        signature.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def find_dbc_files(directory=BASE_DIR):
+    return sorted(glob.glob(os.path.join(directory, "*.dbc")))
+
+
+def _prefix_range(terms, prefix):
+    """sorted 的詞彙表中以 prefix 開頭的範圍 (start, end)"""
+    start = bisect.bisect_left(terms, prefix)
+    end = start
+    while end < len(terms) and terms[end].startswith(prefix):
+        end += 1
+    return start, end
+
+
+def _rank(scores, limit=None):
+    """依分數由高到低排序，同分時依照 DBC 中的順序"""
+    keyed = [(-score, entry_id) for entry_id, score in scores.items()]
+    if limit is None:
+        keyed.sort()
+    else:
+        keyed = heapq.nsmallest(limit, keyed)
+    return [entry_id for _, entry_id in keyed]
+
+
+def build_broad_prefixes(terms, index):
+    """
+    預先合併命中很多訊號的前綴 (例如 id、st)，查詢時不必再合併上千筆 posting
+    回傳 {prefix: (scores, ranked)}，分數規則和 SignalCatalog._match_word 相同
+    前綴命中的數量只會隨長度變少，所以只有 broad 的前綴才需要往下展開
+    """
+    broad = {}
+    pending = sorted({term[:MIN_PREFIX_LEN] for term in terms if len(term) >= MIN_PREFIX_LEN})
+    while pending:
+        prefix = pending.pop()
+        start, end = _prefix_range(terms, prefix)
+        scores = {}
+        for term in terms[start:end]:
+            exact = term == prefix
+            for entry_id, weight in index[term].items():
+                score = weight * 2 if exact else weight
+                if scores.get(entry_id, 0) < score:
+                    scores[entry_id] = score
+        if len(scores) < BROAD_PREFIX_MIN_ENTRIES:
+            continue
+
+        broad[prefix] = (scores, _rank(scores))
+        pending.extend({term[:len(prefix) + 1] for term in terms[start:end]
+                        if len(term) > len(prefix)})
+    return broad
+
+
+def build_catalog(dbc_files):
+    """讀取所有 DBC，建立訊號清單與反向索引"""
+    # 只有重建索引時才需要 cantools，讀快取時不必載入
+    import cantools
+
+    entries = []
+    index = {}
+    frame_ids = {}
+
+    def add_terms(entry_id, text, field):
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            postings = index.setdefault(term, {})
+            if postings.get(entry_id, 0) < weight:
+                postings[entry_id] = weight
+
+    for path in dbc_files:
+        dbc_name = os.path.basename(path)
+        db = cantools.database.load_file(path, strict=False)
+
+        for msg in db.messages:
+            for sig in msg.signals:
+                choices = {}
+                if sig.choices:
+                    choices = {int(k): str(v) for k, v in sig.choices.items()}
+
+                entry_id = len(entries)
+                entries.append({
+                    'entry_id': entry_id,
+                    'dbc': dbc_name,
+                    'message_name': msg.name,
+                    'frame_id': msg.frame_id,
+                    'signal_name': sig.name,
+                    'unit': sig.unit or "",
+                    'comment': sig.comment or "",
+                    'choices': choices,
+                })
+                frame_ids.setdefault(msg.frame_id, []).append(entry_id)
+
+                add_terms(entry_id, sig.name, "signal")
+                add_terms(entry_id, msg.name, "message")
+                add_terms(entry_id, msg.comment, "comment")
+                add_terms(entry_id, sig.unit, "unit")
+                add_terms(entry_id, sig.comment, "comment")
+                for value_name in choices.values():
+                    add_terms(entry_id, value_name, "value")
+
+    # 模糊比對用的 trigram 索引：trigram -> 索引詞編號
+    terms = sorted(index)
+    trigrams = {}
+    for i, term in enumerate(terms):
+        for gram in _trigrams_of(term):
+            trigrams.setdefault(gram, []).append(i)
+
+    return {
+        'version': CATALOG_VERSION,
+        'signature': dbc_signature(dbc_files),
+        'entries': entries,
+        'index': index,
+        'terms': terms,
+        'trigrams': trigrams,
+        'broad_prefixes': build_broad_prefixes(terms, index),
+        'frame_ids': frame_ids,
+    }
+
+
+class SignalCatalog:
+    """
+    所有 DBC 的訊號目錄
+    支援訊號名稱、訊息名稱、Frame ID、單位、註解 (CM_) 和數值表 (VAL_) 的搜尋
+    """
+
+    def __init__(self, data):
+        self.entries = data['entries']
+        self.index = data['index']
+        self.terms = data['terms']
+        self.trigrams = data['trigrams']
+        self.broad_prefixes = data['broad_prefixes']
+        self.frame_ids = data['frame_ids']
+        # 訊號名稱 (小寫) -> entry_id，給完整名稱查詢用
+        self.names = {}
+        for entry_id, entry in enumerate(self.entries):
+            self.names.setdefault(entry['signal_name'].lower(), []).append(entry_id)
+        # 同一個查詢詞的比對結果可以重複使用，限制數量避免長時間使用時一直累積
+        self._match_word = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_word)
+        self._match_chunks = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_chunks)
+
+    @classmethod
+    def load(cls, dbc_files=None, cache_file=CACHE_FILE, rebuild=False):
+        """載入快取的索引；DBC 有變動或快取不存在時才重建"""
+        if dbc_files is None:
+            dbc_files = find_dbc_files()
+        signature = dbc_signature(dbc_files)
+
+        data = None
+        if not rebuild and cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    data = pickle.load(f)
+            except Exception:
+                # 快取壞掉或是舊程式產生的 (例如參照不存在的模組)，一律重建
+                data = None
+            if (not isinstance(data, dict)
+                    or data.get('version') != CATALOG_VERSION
+                    or data.get('signature') != signature):
+                data = None
+
+        if data is None:
+            data = build_catalog(dbc_files)
+            if cache_file:
+                try:
+                    tmp_file = cache_file + ".tmp"
+                    with open(tmp_file, "wb") as f:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp_file, cache_file)
+                except OSError as e:
+                    print(f"無法寫入索引快取 {cache_file}: {e}", file=sys.stderr)
+
+        return cls(data)
+
+    def _prefix_terms(self, prefix):
+        """用二分搜尋找出所有以 prefix 開頭的索引詞"""
+        start = bisect.bisect_left(self.terms, prefix)
+        matched = []
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matched.append(term)
+        return matched
+
+    def _fuzzy_terms(self, word, cutoff=0.6, max_terms=10):
+        """用 trigram 的 Dice 係數找出拼法相近的索引詞"""
+        grams = _trigrams_of(word)
+        counts = {}
+        for gram in grams:
+            for i in self.trigrams.get(gram, ()):
+                counts[i] = counts.get(i, 0) + 1
+
+        scored = []
+        for i, common in counts.items():
+            term = self.terms[i]
+            # 加上邊界後每個詞的 trigram 數量是 len + 1 (重複的 trigram 只算一次，影響不大)
+            dice = 2.0 * common / (len(grams) + len(term) + 1)
+            if dice >= cutoff:
+                scored.append((dice, term))
+        return [term for _, term in heapq.nlargest(max_terms, scored)]
+
+    def _substring_terms(self, word):
+        """找出包含 word 的所有索引詞 (線性掃描整個詞彙表)"""
+        return [term for term in self.terms if word in term]
+
+    def _match_word(self, word, fuzzy, signals_only, substring):
+        """
+        回傳 {entry_id: score}，單一查詢詞可以命中多個索引詞
+        signals_only 時只算訊號名稱的命中 (訊號名稱的權重最高)
+        substring 時用子字串比對取代前綴比對
+        """
+        if not signals_only and not substring and word in self.broad_prefixes:
+            return self.broad_prefixes[word][0]
+
+        min_weight = FIELD_WEIGHTS["signal"] if signals_only else 0
+        scores = {}
+        exact = self.index.get(word)
+        if exact:
+            for entry_id, weight in exact.items():
+                if weight >= min_weight:
+                    scores[entry_id] = weight * 2
+
+        if substring:
+            candidates = self._substring_terms(word)
+        elif len(word) < MIN_PREFIX_LEN:
+            candidates = []
+        else:
+            candidates = self._prefix_terms(word)
+        for term in candidates:
+            if term == word:
+                continue
+            for entry_id, weight in self.index[term].items():
+                if weight >= min_weight and scores.get(entry_id, 0) < weight:
+                    scores[entry_id] = weight
+
+        if fuzzy and not scores:
+            for term in self._fuzzy_terms(word):
+                for entry_id, weight in self.index[term].items():
+                    if weight >= min_weight and scores.get(entry_id, 0) < weight * 0.5:
+                        scores[entry_id] = weight * 0.5
+
+        return scores
+
+    def _match_chunks(self, word, fuzzy, signals_only, substring):
+        """
+        查詢詞依照底線等符號切開後，每一段都要命中 (AND)
+        例如 UI_SOC -> ui, soc
+        """
+        return _intersect([self._match_word(chunk, fuzzy, signals_only, substring)
+                           for chunk in split_chunks(word)])
+
+    def lookup(self, name):
+        """用完整的訊號名稱查詢 (不分大小寫)"""
+        return [self.entries[entry_id] for entry_id in self.names.get(name.lower(), ())]
+
+    def _match_frame_id(self, word):
+        """查詢詞是 Frame ID 時 (0x292 或 658) 回傳對應的訊號"""
+        try:
+            if word.startswith("0x"):
+                frame_id = int(word, 16)
+            elif word.isdigit():
+                frame_id = int(word)
+            else:
+                return {}
+        except ValueError:
+            return {}
+        return {entry_id: 10 for entry_id in self.frame_ids.get(frame_id, ())}
+
+    def search(self, query, fuzzy=True, dbc=None, limit=50, signals_only=False,
+               substring=False):
+        """
+        搜尋訊號
+        多個查詢詞之間是 AND；每個詞會再依照底線等符號切開，
+        每一段做完整比對與前綴比對，找不到時再用模糊比對；
+        和訊號名稱完全相同的結果排在最前面
+        substring=True 時改用子字串比對 (和 `keyword in name` 的結果相同)
+        少於 MIN_PREFIX_LEN 個字元的查詢詞只做完整比對
+        limit 是最多回傳幾筆 (至少 1)，None 表示全部
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit 必須至少為 1: {limit}")
+
+        words = query.lower().split()
+        if not words:
+            return []
+
+        word_scores = []
+        merged = False
+        for word in words:
+            scores = {}
+            if not word.startswith("0x"):
+                scores = self._match_chunks(word, fuzzy, signals_only, substring)
+
+            # 需要合併 Frame ID 或完整名稱的分數時才複製，否則直接用快取的結果
+            frame_scores = self._match_frame_id(word)
+            exact_ids = self.names.get(word, ())
+            if frame_scores or exact_ids:
+                merged = True
+                scores = dict(scores)
+                for entry_id, score in frame_scores.items():
+                    if scores.get(entry_id, 0) < score:
+                        scores[entry_id] = score
+                # 完整的訊號名稱命中排在最前面
+                for entry_id in exact_ids:
+                    scores[entry_id] = scores.get(entry_id, 0) + EXACT_NAME_SCORE
+
+            if not scores:
+                return []
+            word_scores.append(scores)
+
+        word = words[0]
+        if (len(word_scores) == 1 and not merged and not signals_only and not substring
+                and word in self.broad_prefixes):
+            # 命中很多訊號的前綴：直接用建立索引時排好的結果
+            ranked = self.broad_prefixes[word][1]
+        else:
+            total = _intersect(word_scores)
+            if dbc is not None:
+                total = {entry_id: score for entry_id, score in total.items()
+                         if self.entries[entry_id]['dbc'] == dbc}
+                dbc = None
+            ranked = _rank(total, limit)
+
+        results = []
+        for entry_id in ranked:
+            if limit is not None and len(results) >= limit:
+                break
+            entry = self.entries[entry_id]
+            if dbc is not None and entry['dbc'] != dbc:
+                continue
+            results.append(entry)
+        return results
+
+
+def _intersect(score_dicts):
+    """多個 {entry_id: score} 取交集並加總分數"""
+    if not score_dicts:
+        return {}
+    ordered = sorted(score_dicts, key=len)
+    total = ordered[0]
+    for scores in ordered[1:]:
+        total = {entry_id: total[entry_id] + scores[entry_id]
+                 for entry_id in total.keys() & scores.keys()}
+    return total
+
+
+def format_entry(entry):
+    text = (f"[{entry['dbc']}] Message: {entry['message_name']} ({hex(entry['frame_id'])}), "
+            f"Signal: {entry['signal_name']}")
+    if entry['unit']:
+        text += f" [{entry['unit']}]"
+    return text
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="搜尋所有 DBC 檔案中的訊號")
+    parser.add_argument("query", nargs="+", help="查詢詞 (訊號名稱、訊息名稱、Frame ID、單位、註解或數值表)")
+    parser.add_argument("--dbc", help="只搜尋指定的 DBC 檔案，例如 Model3CAN.dbc")
+    parser.add_argument("--limit", type=int, default=50, help="最多顯示幾筆結果")
+    parser.add_argument("--no-fuzzy", action="store_true", help="關閉模糊比對")
+    parser.add_argument("--rebuild", action="store_true", help="強制重建索引")
+    args = parser.parse_args()
+    if args.limit < 1:
+        parser.error("--limit 必須至少為 1")
+
+    catalog = SignalCatalog.load(rebuild=args.rebuild)
+    results = catalog.search(" ".join(args.query), fuzzy=not args.no_fuzzy,
+                             dbc=args.dbc, limit=args.limit)
+
+    if not results:
+        print("沒有找到相符的訊號")
+    for entry in results:
+        print(format_entry(entry))
+        if entry['comment']:
+            print(f"    註解: {entry['comment']}")
+        if entry['choices']:
+            print(f"    數值表: {entry['choices']}")
@@ -0,0 +1,177 @@
+import bisect
+import csv
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse_number(text):
+    """把 CSV 裡的數字轉回 int / float (存檔前是 int 的讀回來也是 int)"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class ChangeSeries:
+    """
+    只記錄數值變化的訊號序列 (run-length)
+    每一段 run 存: 開始時間、最後一筆的時間、數值、這段內收到的 frame 數
+    deadband > 0 時，數值的變化要超過 deadband 才算新的一段
+    """
+
+    def __init__(self, name, deadband=0.0):
+        self.name = name
+        self.deadband = deadband
+        self.starts = []
+        self.ends = []
+        self.values = []
+        self.counts = []
+        self.sample_count = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def _changed(self, value):
+        last = self.values[-1]
+        if _is_number(value) and _is_number(last):
+            if self.deadband > 0:
+                return abs(value - last) > self.deadband
+            return value != last
+        # 數值表的值 (NamedSignalValue) 直接比較
+        return value != last
+
+    def append(self, timestamp, value):
+        """加入一筆資料，開始新的一段時回傳 True"""
+        if self.ends and timestamp < self.ends[-1]:
+            raise ValueError(f"{self.name}: 時間戳必須遞增 ({timestamp} < {self.ends[-1]})")
+
+        self.sample_count += 1
+        if self.values and not self._changed(value):
+            self.ends[-1] = timestamp
+            self.counts[-1] += 1
+            return False
+
+        self.starts.append(timestamp)
+        self.ends.append(timestamp)
+        self.values.append(value)
+        self.counts.append(1)
+        return True
+
+    def value_at(self, timestamp):
+        """時間 timestamp 時的數值 (最後一次變化後的值)，在第一筆之前回傳 None"""
+        i = bisect.bisect_right(self.starts, timestamp) - 1
+        if i < 0:
+            return None
+        return self.values[i]
+
+    def transitions(self):
+        """回傳 [(timestamp, value), ...]，只包含數值變化的時間點"""
+        return list(zip(self.starts, self.values))
+
+    def expand(self, timestamps):
+        """
+        展開成指定時間點的數值 (等同對每個時間點呼叫 value_at)
+        只存了數值變化，原本每個 frame 的時間已經不存在，
+        所以時間軸必須由呼叫端提供 (例如原始 log 的時間戳或固定取樣週期)
+        """
+        return [self.value_at(t) for t in timestamps]
+
+
+class SeriesStore:
+    """
+    多個訊號的 ChangeSeries 集合，可以存成 / 讀回 CSV
+    deadbands: {訊號名稱: deadband}，沒有列出的訊號使用 default_deadband
+    """
+
+    def __init__(self, deadbands=None, default_deadband=0.0):
+        self.deadbands = deadbands or {}
+        self.default_deadband = default_deadband
+        self.series = {}
+
+    def __contains__(self, name):
+        return name in self.series
+
+    def __getitem__(self, name):
+        return self.series[name]
+
+    def __iter__(self):
+        return iter(self.series)
+
+    def __len__(self):
+        return len(self.series)
+
+    def _get_series(self, name):
+        series = self.series.get(name)
+        if series is None:
+            deadband = self.deadbands.get(name, self.default_deadband)
+            series = ChangeSeries(name, deadband)
+            self.series[name] = series
+        return series
+
+    def append(self, timestamp, signals):
+        """
+        加入一個 frame 解碼後的訊號，回傳有變化的訊號 {名稱: 數值}
+        時間戳比已存的資料早時整個 frame 都不加入，丟出 ValueError
+        """
+        # 先檢查所有訊號，避免只加入 frame 的一部分
+        for name in signals:
+            series = self.series.get(name)
+            if series is not None and series.ends and timestamp < series.ends[-1]:
+                raise ValueError(f"{name}: 時間戳必須遞增 ({timestamp} < {series.ends[-1]})")
+
+        changed = {}
+        for name, value in signals.items():
+            if self._get_series(name).append(timestamp, value):
+                changed[name] = value
+        return changed
+
+    def value_at(self, timestamp):
+        """時間 timestamp 時所有訊號的數值"""
+        return {name: series.value_at(timestamp) for name, series in self.series.items()}
+
+    def run_count(self):
+        return sum(len(series) for series in self.series.values())
+
+    def sample_count(self):
+        return sum(series.sample_count for series in self.series.values())
+
+    def save_csv(self, path):
+        """
+        每一段 run 存成一行: signal, start, end, count, kind, value
+        kind 是 number (數值) 或 choice (數值表的名稱)，讀回時不必猜型別
+        """
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["signal", "start", "end", "count", "kind", "value"])
+            for name, series in self.series.items():
+                for start, end, value, count in zip(series.starts, series.ends,
+                                                    series.values, series.counts):
+                    if _is_number(value):
+                        writer.writerow([name, repr(start), repr(end), count, "number", repr(value)])
+                    else:
+                        writer.writerow([name, repr(start), repr(end), count, "choice", str(value)])
+
+    @classmethod
+    def load_csv(cls, path, deadbands=None, default_deadband=0.0):
+        """
+        讀回 save_csv 存的檔案
+        start / end 和數值依照存檔前的型別讀回 int 或 float
+        數值表的值存檔時只留下名稱，讀回後是一般的 str 而不是 NamedSignalValue，
+        所以同一個訊號在存檔前後 value_at 回傳的型別會不同
+        """
+        store = cls(deadbands, default_deadband)
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                series = store._get_series(row["signal"])
+                count = int(row["count"])
+                series.starts.append(_parse_number(row["start"]))
+                series.ends.append(_parse_number(row["end"]))
+                if row["kind"] == "number":
+                    series.values.append(_parse_number(row["value"]))
+                else:
+                    series.values.append(row["value"])
+                series.counts.append(count)
+                series.sample_count += count
+        return store
@@ -1,6 +1,9 @@
 import cantools
 import csv
 import datetime
+import os
+
+from signal_series import SeriesStore
 
 # 載入 Tesla DBC
 db = cantools.database.load_file("Model3CAN.dbc")
@@ -19,8 +22,11 @@ print("=== 開始解析 CSV 檔案 ===")
 print(f"目標訊號: {signals_of_interest}")
 print()
 
-# 存儲解析後的數據
-parsed_data = []
+# 只存儲訊號數值的變化 (run-length)，不再每個 frame 存一筆
+series = SeriesStore()
+frame_count = 0
+start_time = None
+end_time = None
 
 try:
     with open(csv_file, "r", encoding='utf-8') as f:
@@ -81,13 +87,21 @@ try:
                     # 只輸出包含我們關心訊號的訊息
                     if filtered:
                         timestamp_sec = time_ms / 1000.0  # 轉換為秒
-                        parsed_data.append({
-                            'timestamp': timestamp_sec,
-                            'can_id': hex(can_id),
-                            'message_name': msg.name,
-                            'signals': filtered
-                        })
-                        print(f"{timestamp_sec:.3f}s: {filtered}")
+                        try:
+                            changed = series.append(timestamp_sec, filtered)
+                        except ValueError as e:
+                            # 時間戳倒退的 frame 不加入，也不計入統計
+                            print(f"跳過時間戳倒退的訊息: {e}")
+                            continue
+
+                        frame_count += 1
+                        if start_time is None:
+                            start_time = timestamp_sec
+                        end_time = timestamp_sec
+
+                        # 只輸出有變化的訊號
+                        if changed:
+                            print(f"{timestamp_sec:.3f}s: {changed}")
                 
                 except (KeyError, Exception) as e:
                     # 跳過無法解碼的訊息
@@ -103,13 +117,11 @@ except Exception as e:
     print(f"讀取檔案時發生錯誤: {e}")
 
 # 顯示統計資訊
-if parsed_data:
+if frame_count:
     print(f"\n=== 解析統計 ===")
-    print(f"成功解析的訊息數量: {len(parsed_data)}")
+    print(f"成功解析的訊息數量: {frame_count}")
     
     # 時間範圍
-    start_time = parsed_data[0]['timestamp']
-    end_time = parsed_data[-1]['timestamp']
     duration = end_time - start_time
     
     print(f"時間範圍: {duration:.1f} 秒 ({duration/60:.1f} 分鐘)")
@@ -117,18 +129,11 @@ if parsed_data:
     print(f"結束時間: {datetime.datetime.fromtimestamp(end_time)}")
     
     # SOCave292 變化分析
-    soc_ave_data = []
-    for entry in parsed_data:
-        if 'SOCave292' in entry['signals']:
-            soc_ave_data.append({
-                'timestamp': entry['timestamp'],
-                'soc_value': entry['signals']['SOCave292']
-            })
-    
-    if soc_ave_data:
+    if 'SOCave292' in series:
+        soc_ave = series['SOCave292']
         print(f"\n=== SOCave292 變化分析 ===")
-        start_soc = soc_ave_data[0]['soc_value']
-        end_soc = soc_ave_data[-1]['soc_value']
+        start_soc = soc_ave.values[0]
+        end_soc = soc_ave.values[-1]
         soc_change = end_soc - start_soc
         
         print(f"起始 SOCave292: {start_soc:.2f}%")
@@ -139,17 +144,17 @@ if parsed_data:
             soc_rate_per_hour = soc_change / (duration / 3600)
             print(f"變化率: {soc_rate_per_hour:+.3f}% per hour")
         
-        print(f"SOCave292 資料點數量: {len(soc_ave_data)}")
+        print(f"SOCave292 資料點數量: {soc_ave.sample_count}")
     
     # 訊號統計
-    signal_counts = {}
-    for entry in parsed_data:
-        for signal_name in entry['signals'].keys():
-            signal_counts[signal_name] = signal_counts.get(signal_name, 0) + 1
-    
     print(f"\n=== 訊號統計 ===")
-    for signal_name, count in signal_counts.items():
-        print(f"{signal_name}: {count} 個資料點")
+    for signal_name in series:
+        print(f"{signal_name}: {series[signal_name].sample_count} 個資料點, {len(series[signal_name])} 次變化")
+    
+    # 只存數值變化，檔案比逐 frame 輸出小很多
+    changes_file = os.path.splitext(csv_file)[0] + "_changes.csv"
+    series.save_csv(changes_file)
+    print(f"\n數值變化已存到 {changes_file} ({series.run_count()} 筆 / 原本 {series.sample_count()} 筆)")
 
 else:
     print("沒有找到相符的訊號資料")
\ No newline at end of file
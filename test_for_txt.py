@@ -1,9 +1,12 @@
 import cantools
 import datetime
+import os
 
 import cantools
 import datetime
 
+from signal_series import SeriesStore
+
 # 載入 Tesla DBC
 db = cantools.database.load_file("Model3CAN.dbc")
 
@@ -23,8 +26,11 @@ print(f"檔案: {txt_file}")
 print(f"目標訊號: {signals_of_interest}")
 print()
 
-# 存儲解析後的數據
-parsed_data = []
+# 只存儲訊號數值的變化 (run-length)，以行號作為時間軸
+series = SeriesStore()
+frame_count = 0
+start_line = None
+end_line = None
 
 def parse_hex_line(hex_string):
     """
@@ -80,13 +86,15 @@ try:
                 filtered = {sig: decoded.get(sig) for sig in signals_of_interest if sig in decoded}
                 
                 if filtered:
-                    parsed_data.append({
-                        'line_num': line_num,
-                        'can_id': hex(can_id),
-                        'message_name': msg.name,
-                        'signals': filtered
-                    })
-                    print(f"Line {line_num}: CAN ID {hex(can_id)} - {filtered}")
+                    changed = series.append(line_num, filtered)
+                    frame_count += 1
+                    if start_line is None:
+                        start_line = line_num
+                    end_line = line_num
+
+                    # 只輸出有變化的訊號
+                    if changed:
+                        print(f"Line {line_num}: CAN ID {hex(can_id)} - {changed}")
                     
             except (KeyError, Exception) as e:
                 # 跳過無法解碼的訊息
@@ -143,13 +151,16 @@ try:
                     
                     # 只處理包含我們關心訊號的訊息
                     if filtered:
-                        parsed_data.append({
-                            'timestamp': timestamp,
-                            'can_id': hex(can_id),
-                            'message_name': msg.name,
-                            'signals': filtered
-                        })
-                        print(f"{timestamp:.3f}s: {filtered}")
+                        # 和上面一樣以行號作為時間軸，統計才會一致
+                        changed = series.append(line_num, filtered)
+                        frame_count += 1
+                        if start_line is None:
+                            start_line = line_num
+                        end_line = line_num
+
+                        # 只輸出有變化的訊號
+                        if changed:
+                            print(f"{timestamp:.3f}s: {changed}")
                 
                 except (KeyError, Exception):
                     # 跳過無法解碼的訊息
@@ -166,45 +177,35 @@ except Exception as e:
     print(f"讀取檔案時發生錯誤: {e}")
 
 # 顯示統計資訊
-if parsed_data:
+if frame_count:
     print(f"\n=== 解析統計 ===")
-    print(f"成功解析的訊息數量: {len(parsed_data)}")
+    print(f"成功解析的訊息數量: {frame_count}")
     
     # 行數範圍
-    start_line = parsed_data[0]['line_num']
-    end_line = parsed_data[-1]['line_num']
-    
     print(f"行數範圍: {start_line} - {end_line}")
     
     # SOCave292 變化分析
-    soc_ave_data = []
-    for entry in parsed_data:
-        if 'SOCave292' in entry['signals']:
-            soc_ave_data.append({
-                'line_num': entry['line_num'],
-                'soc_value': entry['signals']['SOCave292']
-            })
-    
-    if soc_ave_data:
+    if 'SOCave292' in series:
+        soc_ave = series['SOCave292']
         print(f"\n=== SOCave292 變化分析 ===")
-        start_soc = soc_ave_data[0]['soc_value']
-        end_soc = soc_ave_data[-1]['soc_value']
+        start_soc = soc_ave.values[0]
+        end_soc = soc_ave.values[-1]
         soc_change = end_soc - start_soc
         
-        print(f"起始 SOCave292 (行 {soc_ave_data[0]['line_num']}): {start_soc:.2f}%")
-        print(f"結束 SOCave292 (行 {soc_ave_data[-1]['line_num']}): {end_soc:.2f}%")
+        print(f"起始 SOCave292 (行 {soc_ave.starts[0]}): {start_soc:.2f}%")
+        print(f"結束 SOCave292 (行 {soc_ave.ends[-1]}): {end_soc:.2f}%")
         print(f"SOC 變化: {soc_change:+.2f}%")
-        print(f"SOCave292 資料點數量: {len(soc_ave_data)}")
+        print(f"SOCave292 資料點數量: {soc_ave.sample_count}")
     
     # 訊號統計
-    signal_counts = {}
-    for entry in parsed_data:
-        for signal_name in entry['signals'].keys():
-            signal_counts[signal_name] = signal_counts.get(signal_name, 0) + 1
-    
     print(f"\n=== 訊號統計 ===")
-    for signal_name, count in signal_counts.items():
-        print(f"{signal_name}: {count} 個資料點")
+    for signal_name in series:
+        print(f"{signal_name}: {series[signal_name].sample_count} 個資料點, {len(series[signal_name])} 次變化")
+    
+    # 只存數值變化 (start / end 欄位是行號)
+    changes_file = os.path.splitext(txt_file)[0] + "_changes.csv"
+    series.save_csv(changes_file)
+    print(f"\n數值變化已存到 {changes_file} ({series.run_count()} 筆 / 原本 {series.sample_count()} 筆)")
 
 else:
     print("沒有找到相符的訊號資料")